@@ -5,8 +5,165 @@ This module provides functionality to compress images to a specified target size
 """
 
 import os
-from PIL import Image
+import multiprocessing
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image, features
 import io
+from pathlib import Path
+
+# The quality search below re-encodes the image several times, so it relies on
+# Pillow being linked against libjpeg-turbo for its SIMD DCT/Huffman encoder.
+try:
+    HAS_LIBJPEG_TURBO = bool(features.check_feature('libjpeg_turbo'))
+except ValueError:
+    HAS_LIBJPEG_TURBO = False
+
+if not HAS_LIBJPEG_TURBO:
+    warnings.warn(
+        "Pillow is not linked against libjpeg-turbo; JPEG compression will be slower. "
+        "Install an official Pillow wheel or build it against libjpeg-turbo.",
+        RuntimeWarning,
+    )
+
+# PyTurboJPEG is optional: when present, JPEG encodes bypass Pillow's plugin layer
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420
+    _turbo = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbo = None
+
+
+def _encode(image, buffer, quality, save_options, array=None):
+    """
+    Encode an image into the reusable buffer and return the encoded size.
+    
+    Args:
+        image (PIL.Image.Image): RGB image to encode
+        buffer (io.BytesIO): Buffer that receives the encoded bytes
+        quality (int): Encoder quality
+        save_options (dict): Pillow save() keyword arguments, including the format
+        array (numpy.ndarray, optional): Cached pixel array of ``image`` for TurboJPEG
+    
+    Returns:
+        int: Size of the encoded image in bytes
+    """
+    buffer.seek(0)
+    buffer.truncate()
+    if _turbo is not None and save_options['format'] == 'JPEG':
+        if array is None:
+            array = np.asarray(image)
+        buffer.write(_turbo.encode(array, quality=quality, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420))
+    else:
+        image.save(buffer, quality=quality, **save_options)
+    return buffer.getbuffer().nbytes
+
+def _composite_on_white(image):
+    """
+    Flatten an RGBA image onto a white background in a single integer pass.
+    
+    Args:
+        image (PIL.Image.Image): RGBA image
+    
+    Returns:
+        PIL.Image.Image: RGB image
+    """
+    pixels = np.asarray(image, dtype=np.uint16)
+    alpha = pixels[..., 3:4]
+    rgb = (pixels[..., :3] * alpha + 255 * (255 - alpha) + 127) // 255
+    return Image.fromarray(rgb.astype(np.uint8), 'RGB')
+
+# Qualities encoded in parallel to bracket the search (95 is tried up front)
+QUALITY_GRID = (5, 15, 25, 35, 45, 55, 65, 75, 85)
+
+# The parallel grid is only used for images at least this large (pixels) ...
+PARALLEL_MIN_PIXELS = 4_000_000
+
+# ... and with at most this many worker processes, each holding a copy of the image
+MAX_WORKERS = 4
+
+# Resizes tried from the full-size image when quality alone cannot reach the target
+MAX_RESIZE_ATTEMPTS = 4
+
+# Results within this fraction of the target count as successful
+SIZE_TOLERANCE = 0.2
+
+# Decoded image shared with each worker process, set once by _init_worker
+_worker_image = None
+
+
+def _init_worker(data, size, mode):
+    """Rebuild the already-converted image once per worker process."""
+    global _worker_image
+    _worker_image = Image.frombytes(mode, size, data)
+
+
+def _encode_at_quality(quality, save_options):
+    """Encode the worker's image at one quality and return (quality, encoded bytes)."""
+    buffer = io.BytesIO()
+    _encode(_worker_image, buffer, quality, save_options)
+    return quality, buffer.getvalue()
+
+def _decode_scaled(input_path, size):
+    """
+    Decode a JPEG at the smallest DCT scale that is still at least ``size``.
+    
+    Args:
+        input_path (str): Path to the JPEG file
+        size (tuple): Requested (width, height)
+    
+    Returns:
+        PIL.Image.Image: RGB image
+    """
+    with Image.open(input_path) as image:
+        image.draft('RGB', size)
+        return image.convert('RGB')
+
+def _refine_final(image, buffer, quality, target_size_bytes, final, results):
+    """
+    Re-encode the search winner with the final settings and step quality up while it fits.
+    
+    Args:
+        image (PIL.Image.Image): RGB image being compressed
+        buffer (io.BytesIO): Holds the fast encode of ``quality``; receives the chosen encode
+        quality (int): Quality picked by the fast search
+        target_size_bytes (int): Target file size in bytes
+        final (dict): Pillow save() keyword arguments for the written file
+        results (dict): Fast encodes from the search, keyed by quality
+    
+    Returns:
+        tuple: (quality, size in bytes) of the encode left in the buffer
+    """
+    fast_encoded = buffer.getvalue()
+    size = _encode(image, buffer, quality, final)
+    if size > target_size_bytes:
+        # Keep the smaller of the two when the final settings do not bring it under target
+        if len(fast_encoded) < size:
+            _write_buffer(buffer, fast_encoded)
+            size = len(fast_encoded)
+        return quality, size
+    
+    # Predict where the optimized size crosses the target from the fast sizes, then bisect
+    shrink = size / len(fast_encoded)
+    best = buffer.getvalue()
+    low = quality
+    high = min((q for q, data in results.items() if q > quality and len(data) * shrink > target_size_bytes), default=96)
+    while high - low > 1 and len(best) < target_size_bytes * 0.95:  # Stop within 5% of target
+        candidate = (low + high) // 2
+        if _encode(image, buffer, candidate, final) <= target_size_bytes:
+            low, best = candidate, buffer.getvalue()
+        else:
+            high = candidate
+    
+    _write_buffer(buffer, best)
+    return low, len(best)
+
+def _write_buffer(buffer, data):
+    """Replace the buffer's contents with ``data``."""
+    buffer.seek(0)
+    buffer.truncate()
+    buffer.write(data)
 
 def compress_image(input_path, output_path, target_size_bytes):
     """
@@ -28,73 +185,139 @@ def compress_image(input_path, output_path, target_size_bytes):
     
     # Start with quality 95
     quality = 95
-    output_size = float('inf')
-    
-    # Binary search approach to find the right quality
-    min_quality = 5  # Minimum acceptable quality
-    max_quality = 95
-    
-    # Convert PNG to RGB if needed (to avoid errors with palette images)
-    if img_format == 'PNG' and original_image.mode == 'RGBA':
-        # Create a white background
-        background = Image.new('RGBA', original_image.size, (255, 255, 255))
-        # Paste the image on the background
-        composite = Image.alpha_composite(background, original_image)
-        original_image = composite.convert('RGB')
+    
+    # Minimum acceptable quality
+    min_quality = 5
+    
+    # Decode now; load() also releases the file handle for single-frame images
+    source_image = original_image
+    try:
+        source_image.load()
+    except Exception:
+        source_image.close()
+        raise
+    
+    # Single conversion path to RGB: flatten alpha onto white, convert other non-RGB modes,
+    # and leave RGB images untouched
+    if original_image.mode == 'RGBA':
+        original_image = _composite_on_white(original_image)
     elif original_image.mode != 'RGB':
         original_image = original_image.convert('RGB')
     
+    # Release the decoded source as soon as a converted copy replaces it
+    if original_image is not source_image:
+        source_image.close()
+    
+    # Fast encoder settings for the search; Huffman optimization never makes a file larger,
+    # so a fast size that fits is a safe upper bound. The winner is re-encoded with the
+    # final settings once the search converges (see _refine_final).
+    fast = dict(format=img_format, optimize=False, progressive=False)
+    final = dict(format=img_format, optimize=True, progressive=True)
+    use_turbo = _turbo is not None and img_format == 'JPEG'
+    array = np.asarray(original_image) if use_turbo else None
+    
     # Initial compression attempt
     buffer = io.BytesIO()
-    original_image.save(buffer, format=img_format, quality=quality, optimize=True)
-    output_size = buffer.tell()
+    output_size = _encode(original_image, buffer, quality, fast, array)
     
     # If the image is already smaller than target size, no need to compress
     if output_size <= target_size_bytes:
-        original_image.save(output_path, format=img_format, quality=quality, optimize=True)
+        if not use_turbo:
+            _refine_final(original_image, buffer, quality, target_size_bytes, final, {})
+        Path(output_path).write_bytes(buffer.getvalue())
         return True
     
-    # Binary search to find optimal quality
-    while min_quality <= max_quality:
-        quality = (min_quality + max_quality) // 2
-        buffer = io.BytesIO()
-        original_image.save(buffer, format=img_format, quality=quality, optimize=True)
-        output_size = buffer.tell()
-        
+    # Encoded candidates by quality, starting with the q95 attempt above
+    results = {quality: buffer.getvalue()}
+    
+    # For large images on multi-core machines, encode a coarse quality grid in parallel first;
+    # the image is shipped to each worker once. Small images are not worth the process startup.
+    workers = min(len(QUALITY_GRID), os.cpu_count() or 1, MAX_WORKERS)
+    if workers > 1 and original_image.width * original_image.height >= PARALLEL_MIN_PIXELS:
+        # Spawn rather than fork: this runs from a GUI worker thread, and forking a
+        # multi-threaded process can deadlock the child
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(original_image.tobytes(), original_image.size, original_image.mode),
+        ) as executor:
+            results.update(executor.map(_encode_at_quality, QUALITY_GRID, [fast] * len(QUALITY_GRID)))
+    
+    # Size is monotone in quality: bisect between the highest quality known to fit
+    # and the lowest quality known to be too large
+    low = max((q for q, data in results.items() if len(data) <= target_size_bytes), default=min_quality - 1)
+    high = min(q for q in results if q > low)
+    while high - low > 1:
         # Check if we're close enough to the target size
-        if abs(output_size - target_size_bytes) < target_size_bytes * 0.05:  # Within 5% of target
+        if low >= min_quality and len(results[low]) >= target_size_bytes * 0.95:  # Within 5% of target
             break
         
-        if output_size > target_size_bytes:
-            max_quality = quality - 1
+        candidate = (low + high) // 2
+        _encode(original_image, buffer, candidate, fast, array)
+        results[candidate] = buffer.getvalue()
+        if len(results[candidate]) <= target_size_bytes:
+            low = candidate
         else:
-            min_quality = quality + 1
+            high = candidate
+    
+    # Keep the highest quality that fits, or the lowest quality if none do
+    quality = max(low, min_quality)
+    encoded = results[quality]
+    
+    _write_buffer(buffer, encoded)
+    output_size = len(encoded)
+    
+    # TurboJPEG bytes are written as-is; otherwise recover the optimized-encode savings,
+    # which may also let the lowest quality reach the target without resizing
+    if not use_turbo:
+        quality, output_size = _refine_final(original_image, buffer, quality, target_size_bytes, final, results)
     
     # If we're still too large, try reducing dimensions
     if output_size > target_size_bytes:
-        width, height = original_image.size
-        ratio = (target_size_bytes / output_size) ** 0.5  # Square root to apply to both dimensions
+        source_image = original_image
+        width, height = source_image.size
+        ratio = (target_size_bytes / output_size) ** 0.5 * 0.95  # Square root to apply to both dimensions, 5% margin
+        max_ratio = 1.0
         
-        # Reduce size iteratively
-        while output_size > target_size_bytes and width > 50 and height > 50:
-            width = int(width * 0.9)  # Reduce by 10% each time
-            height = int(height * 0.9)
-            resized_img = original_image.resize((width, height), Image.LANCZOS)
-            
-            buffer = io.BytesIO()
-            resized_img.save(buffer, format=img_format, quality=quality, optimize=True)
-            output_size = buffer.tell()
+        # For JPEG inputs, let libjpeg decode again at reduced DCT scale (1/2, 1/4, 1/8)
+        # instead of resampling the full-size image
+        if img_format == 'JPEG' and ratio <= 0.5:
+            source_image = _decode_scaled(input_path, (int(width * ratio), int(height * ratio)))
+            # Never re-aim past the decoded size, which would upscale the drafted image
+            max_ratio = source_image.width / width
+        
+        # Resize straight to the estimated dimensions, always from the same source,
+        # until the size lands inside the accepted band below the target
+        lower_bound = target_size_bytes * (1 - SIZE_TOLERANCE)
+        best_size, best_encoded = 0, None
+        for _ in range(MAX_RESIZE_ATTEMPTS):
+            new_width, new_height = max(50, int(width * ratio)), max(50, int(height * ratio))
+            resized_img = source_image.resize((new_width, new_height), Image.LANCZOS, reducing_gap=2.0)
+            output_size = _encode(resized_img, buffer, quality, final)
             
             if output_size <= target_size_bytes:
-                original_image = resized_img
+                # Keep the largest attempt that fits
+                if output_size > best_size:
+                    best_size, best_encoded = output_size, buffer.getvalue()
+                if output_size > lower_bound:
+                    break
+            elif new_width == 50 or new_height == 50:
                 break
+            
+            # Re-aim at the middle of the band; this scales back up after an undershoot
+            ratio = min(max_ratio, ratio * (target_size_bytes * (1 - SIZE_TOLERANCE / 2) / output_size) ** 0.5)
+        
+        # Fall back to the last (smallest) attempt if none fit
+        if best_encoded is not None:
+            _write_buffer(buffer, best_encoded)
     
-    # Save the final compressed image
-    original_image.save(output_path, format=img_format, quality=quality, optimize=True)
+    # Save the final compressed image; the buffer already holds its encode
+    final_size = buffer.getbuffer().nbytes
+    Path(output_path).write_bytes(buffer.getvalue())
     
     # Verify final size
-    final_size = os.path.getsize(output_path)
-    return abs(final_size - target_size_bytes) < target_size_bytes * 0.2  # Within 20% of target
+    return abs(final_size - target_size_bytes) < target_size_bytes * SIZE_TOLERANCE
 
 # Example usage if run directly
 if __name__ == "__main__":
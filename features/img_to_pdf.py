@@ -8,23 +8,38 @@ import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageTk
 import tempfile
 
+# Background threads used to decode thumbnails
+THUMBNAIL_WORKERS = min(4, os.cpu_count() or 1)
+
+
 class DraggableImageItem(tk.Canvas):
     """Canvas widget that displays an image with a label and supports drag-and-drop reordering."""
-    def __init__(self, parent, image_path, width=100, height=100, **kwargs):
+    # Placeholder thumbnails shared by every item of the same size
+    _placeholders = {}
+    
+    def __init__(self, parent, image_path, width=100, height=100, on_drop=None, loader=None,
+                 **kwargs):
         super().__init__(parent, width=width, height=height, **kwargs)
         self.image_path = image_path
         self.parent = parent
         self.width = width
         self.height = height
+        self.on_drop = on_drop
         
-        # Load and resize the image for preview
-        self.load_image()
+        # Show a placeholder until the thumbnail loads
+        size = (width-10, height-20)
+        if size not in self._placeholders:
+            self._placeholders[size] = self._to_photo(Image.new("RGB", size, "lightgray"))
+        self.tk_img = self._placeholders[size]
         
         # Draw the image and filename
-        self.create_image(width//2, height//2, image=self.tk_img)
+        self.image_id = self.create_image(width//2, height//2, image=self.tk_img)
         filename = os.path.basename(image_path)
         if len(filename) > 15:
             filename = filename[:12] + "..."
@@ -41,22 +56,60 @@ class DraggableImageItem(tk.Canvas):
         # Store drag data
         self.drag_data = {"x": 0, "y": 0, "item": None, "index": -1}
         
-    def load_image(self):
-        """Load and resize the image for the preview thumbnail."""
+        # Decode the thumbnail off the Tk thread, on the owner's shared loader pool if given
+        self.destroyed = False
+        if loader is not None:
+            loader.submit(self._load_thumb_async)
+        else:
+            threading.Thread(target=self._load_thumb_async, daemon=True).start()
+    
+    def destroy(self):
+        """Destroy the widget and skip any thumbnail load still queued for it."""
+        self.destroyed = True
+        super().destroy()
+        
+    def _load_thumb_async(self):
+        """Load and resize the image for the preview thumbnail in a background thread."""
+        if self.destroyed:
+            return
         try:
-            img = Image.open(self.image_path)
-            img.thumbnail((self.width-10, self.height-20))
-            self.tk_img = ImageTk.PhotoImage(img)
+            with Image.open(self.image_path) as src:
+                src.draft("RGB", (self.width*2, self.height*2))  # Let libjpeg downscale to near-target while decoding
+                src.thumbnail((self.width-10, self.height-20), Image.LANCZOS, reducing_gap=2.0)
+                img = src.copy()
         except Exception as e:
-            # Use a placeholder if image loading fails
-            self.tk_img = None
+            # Keep the placeholder if image loading fails
             print(f"Error loading image {self.image_path}: {e}")
+            return
+        
+        try:
+            self.after(0, self._set_thumb, img)
+        except (RuntimeError, tk.TclError):
+            pass  # The item was destroyed while loading
+    
+    @classmethod
+    def _to_photo(cls, img):
+        """Convert a PIL image to a Tk PhotoImage through the direct RGB/RGBA block copy."""
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        img.load()
+        return ImageTk.PhotoImage(img)
+    
+    def _set_thumb(self, img):
+        """Swap the placeholder for the loaded thumbnail (runs on the Tk thread)."""
+        if not self.winfo_exists():
+            return
+        self.tk_img = self._to_photo(img)
+        self.itemconfigure(self.image_id, image=self.tk_img)
             
     def on_press(self, event):
         """Begin drag operation."""
         self.drag_data["x"] = event.x
         self.drag_data["y"] = event.y
         self.drag_data["item"] = self
+        # Take the item out of the grid once, so each motion event is a single place() move
+        self.grid_slot = self.grid_info()
+        self.place(x=self.winfo_x(), y=self.winfo_y())
         # Raise this canvas above others
         self.lift()
         # Change appearance to indicate dragging
@@ -69,16 +122,21 @@ class DraggableImageItem(tk.Canvas):
         dy = event.y - self.drag_data["y"]
         
         # Move the canvas
-        self.place(x=self.winfo_x() + dx, y=self.winfo_y() + dy)
+        self.place_configure(x=self.winfo_x() + dx, y=self.winfo_y() + dy)
         
     def on_release(self, event):
         """End drag operation and reorder items."""
         # Reset appearance
         self.configure(highlightbackground="gray", highlightthickness=1)
         
-        # Notify parent about the drop for reordering
-        if hasattr(self.parent, "reorder_images"):
-            self.parent.reorder_images(self)
+        # Notify the owner about the drop for reordering
+        if self.on_drop:
+            self.on_drop(self)
+        
+        # Return to the original grid cell if the drop did not regrid the items
+        if self.winfo_exists() and self.winfo_manager() == "place":
+            self.place_forget()
+            self.grid(**self.grid_slot)
 
 
 class ImageToPdfFeature:
@@ -91,6 +149,18 @@ class ImageToPdfFeature:
         self.pdf_image_paths = []
         self.image_items = []
         
+        # Widgets kept across list updates, keyed by image path; keeping an item keeps its
+        # thumbnail, so only newly added images are decoded
+        self._item_by_path = {}
+        
+        # One bounded pool decodes thumbnails, so adding many images does not start a thread each
+        self._thumb_loader = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+        
+        # Thumbnail grid layout, shared by update_image_list and reorder_images
+        self.grid_cols = 4
+        self.grid_padx = 5
+        self.grid_pady = 5
+        
         # Create the tab
         self.create_tab()
     
@@ -141,6 +211,14 @@ class ImageToPdfFeature:
         # Configure the canvas to resize with the window
         self.images_container.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
         
+        # Placeholder shown while the list is empty
+        self.empty_label = ttk.Label(
+            self.images_container,
+            text="No images added yet. Click 'Add Images' to begin.",
+            font=("Arial", 10),
+            foreground="gray"
+        )
+        
         # Progress bar
         pdf_progress_frame = ttk.LabelFrame(self.tab, text="Progress")
         pdf_progress_frame.pack(fill='x', padx=10, pady=5)
@@ -176,42 +254,42 @@ class ImageToPdfFeature:
             self.update_image_list()
     
     def update_image_list(self):
-        """Update the image list display with current images."""
-        # Clear existing items
-        for widget in self.images_container.winfo_children():
-            widget.destroy()
+        """Update the image list display, creating or destroying only the items that changed."""
+        current_paths = set(self.pdf_image_paths)
         
-        self.image_items = []
+        # Destroy items whose images were removed
+        for path in list(self._item_by_path):
+            if path not in current_paths:
+                self._item_by_path.pop(path).destroy()
         
-        # Create a grid of image items
-        if self.pdf_image_paths:
-            cols = 4  # Number of columns in the grid
-            for i, path in enumerate(self.pdf_image_paths):
-                row, col = divmod(i, cols)
-                
-                # Create the draggable image item
+        # Create items only for newly added images
+        for path in self.pdf_image_paths:
+            if path not in self._item_by_path:
                 item = DraggableImageItem(
                     self.images_container, 
                     path, 
                     width=120, 
                     height=120,
+                    on_drop=self.reorder_images,
+                    loader=self._thumb_loader,
                     bg="white",
                 )
-                item.grid(row=row, column=col, padx=5, pady=5)
-                
-                # Store reference to the item
-                self.image_items.append(item)
                 
-                # Bind double-click to remove
-                item.bind("<Double-Button-1>", lambda e, idx=i: self.remove_image(idx))
+                # Bind double-click to remove (looked up by path so it survives reordering)
+                item.bind("<Double-Button-1>", lambda e, p=path: self.remove_image(self.pdf_image_paths.index(p)))
+                self._item_by_path[path] = item
+        
+        # Restack the grid in the current order
+        self.image_items = [self._item_by_path[path] for path in self.pdf_image_paths]
+        for i, item in enumerate(self.image_items):
+            row, col = divmod(i, self.grid_cols)
+            item.grid(row=row, column=col, padx=self.grid_padx, pady=self.grid_pady)
+        
+        if self.pdf_image_paths:
+            self.empty_label.grid_remove()
         else:
             # Show a message when no images are added
-            ttk.Label(
-                self.images_container,
-                text="No images added yet. Click 'Add Images' to begin.",
-                font=("Arial", 10),
-                foreground="gray"
-            ).grid(row=0, column=0, padx=20, pady=40)
+            self.empty_label.grid(row=0, column=0, padx=20, pady=40)
     
     def remove_image(self, index):
         """Remove an image from the list."""
@@ -224,25 +302,15 @@ class ImageToPdfFeature:
         # Find the grid position where the item was dropped
         x, y = dropped_item.winfo_x() + dropped_item.winfo_width() // 2, dropped_item.winfo_y() + dropped_item.winfo_height() // 2
         
-        # Find the closest item at the drop position
-        closest_idx = -1
-        min_dist = float('inf')
-        
-        for i, item in enumerate(self.image_items):
-            item_x = item.winfo_x() + item.winfo_width() // 2
-            item_y = item.winfo_y() + item.winfo_height() // 2
-            dist = (x - item_x) ** 2 + (y - item_y) ** 2
-            
-            if dist < min_dist:
-                min_dist = dist
-                closest_idx = i
+        # Let the grid map the drop position to a cell; the dragged item's own size is
+        # unreliable here because it still carries the drag highlight border
+        col, row = self.images_container.grid_location(x, y)
+        target_col = min(self.grid_cols - 1, max(0, col))
+        target_row = max(0, row)
+        closest_idx = min(len(self.image_items) - 1, target_row * self.grid_cols + target_col)
         
         # Find the original index of the dragged item
-        orig_idx = -1
-        for i, item in enumerate(self.image_items):
-            if item == dropped_item:
-                orig_idx = i
-                break
+        orig_idx = self.image_items.index(dropped_item) if dropped_item in self.image_items else -1
         
         if orig_idx != -1 and closest_idx != -1 and orig_idx != closest_idx:
             # Reorder the paths list
@@ -323,6 +391,83 @@ class ImageToPdfFeature:
         messagebox.showerror("PDF Creation Error", f"An error occurred:\n{error_message}")
 
 
+# Images decoded ahead of the PDF writer; bounds peak memory while keeping decode overlapped
+PREFETCH_IMAGES = 2
+
+# JPEG pages are decoded at reduced DCT scale down to roughly this longest edge (pixels)
+PDF_MAX_EDGE = 2000
+
+# Pillow's default PDF resolution (dpi)
+PDF_RESOLUTION = 72.0
+
+# Decoded pixels held before a batch of pages is written (about 300 MB of RGB data)
+PDF_BATCH_PIXELS = 100_000_000
+
+
+def _load_rgb(path):
+    """
+    Open an image and convert it to RGB (required for PDF compatibility).
+    
+    Returns:
+        tuple: (RGB image, PDF resolution that keeps the page at its original size)
+    """
+    try:
+        img = Image.open(path)
+        try:
+            # Size is read from the header; shrink oversized JPEGs while decoding
+            width, height = img.size
+            if img.format == "JPEG" and max(width, height) > PDF_MAX_EDGE:
+                scale = PDF_MAX_EDGE / max(width, height)
+                img.draft("RGB", (int(width * scale), int(height * scale)))
+            
+            # Decode here, on the worker thread; this also releases single-frame file handles
+            img.load()
+        except Exception:
+            img.close()
+            raise
+        
+        # Draft scales are powers of two, so pages share a few exact resolutions
+        resolution = PDF_RESOLUTION / round(width / img.width)
+        if img.mode == "RGB":
+            return img, resolution
+        
+        # Convert, then free the source straight away instead of waiting for GC
+        with img:
+            return img.convert("RGB"), resolution
+    except Exception as e:
+        raise ValueError(f"Failed to process image {os.path.basename(path)}: {str(e)}")
+
+
+def _iter_rgb(image_paths, prefetch=PREFETCH_IMAGES):
+    """Yield (RGB image, resolution) pairs in order, decoding at most ``prefetch`` ahead on a thread pool."""
+    paths = iter(image_paths)
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        pending = deque(executor.submit(_load_rgb, path) for path in itertools.islice(paths, prefetch))
+        while pending:
+            loaded = pending.popleft().result()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append(executor.submit(_load_rgb, next_path))
+            yield loaded
+
+
+def _write_pdf_batch(pdf_path, images, resolution, append):
+    """Write a batch of RGB images as PDF pages in one save call, then close them."""
+    try:
+        images[0].save(
+            pdf_path,
+            format="PDF",
+            save_all=True,
+            append_images=images[1:],
+            append=append,
+            resolution=resolution
+        )
+    finally:
+        for img in images:
+            img.close()
+    return len(images)
+
+
 def images_to_pdf(image_paths, output_path, progress_callback=None):
     """
     Convert multiple images to a single PDF with the specified order.
@@ -339,50 +484,32 @@ def images_to_pdf(image_paths, output_path, progress_callback=None):
         if not image_paths:
             raise ValueError("No images provided")
             
-        # Open all images
-        images = []
-        for i, path in enumerate(image_paths):
-            try:
-                # Open the image and convert to RGB (required for PDF compatibility)
-                img = Image.open(path)
-                if img.mode == "RGBA":
-                    img = img.convert("RGB")
-                elif img.mode != "RGB":
-                    img = img.convert("RGB")
-                images.append(img)
-                
-                # Report progress for loading images (0-50%)
-                if progress_callback:
-                    progress = int(50 * (i + 1) / len(image_paths))
-                    progress_callback(progress)
-                    
-            except Exception as e:
-                raise ValueError(f"Failed to process image {os.path.basename(path)}: {str(e)}")
+        # Use a temporary file next to the output so the final move is a rename, not a copy
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", dir=output_dir) as tmp_file:
+            temp_path = tmp_file.name
         
-        if not images:
-            raise ValueError("No valid images to convert")
+        # Write pages in batches that share a resolution. Each batch is a single save_all call;
+        # a typical document fits in one batch, and the pixel budget bounds how much decoded
+        # image data is held in memory for very large ones.
+        batch, batch_resolution, batch_pixels, written = [], None, 0, 0
+        last_progress = -1
+        for i, (img, resolution) in enumerate(_iter_rgb(image_paths)):
+            if batch and (resolution != batch_resolution or batch_pixels >= PDF_BATCH_PIXELS):
+                written += _write_pdf_batch(temp_path, batch, batch_resolution, append=written > 0)
+                batch, batch_pixels = [], 0
+            batch.append(img)
+            batch_resolution = resolution
+            batch_pixels += img.width * img.height
             
-        # Get first image
-        first_image = images[0]
+            # Report progress for loading and writing pages (0-90%), only when the percentage changes
+            if progress_callback:
+                progress = int(90 * (i + 1) / len(image_paths))
+                if progress != last_progress:
+                    progress_callback(progress)
+                    last_progress = progress
         
-        # Use a temporary file for conversion
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            temp_path = tmp_file.name
-            
-        # Save remaining images as PDF
-        if len(images) > 1:
-            first_image.save(
-                temp_path,
-                save_all=True,
-                append_images=images[1:],
-                format="PDF"
-            )
-        else:
-            first_image.save(temp_path, format="PDF")
-            
-        # Report progress for PDF creation (50-90%)
-        if progress_callback:
-            progress_callback(90)
+        _write_pdf_batch(temp_path, batch, batch_resolution, append=written > 0)
             
         # Move the temp file to the output path
         import shutil
@@ -392,10 +519,6 @@ def images_to_pdf(image_paths, output_path, progress_callback=None):
         if progress_callback:
             progress_callback(100)
             
-        # Close all images
-        for img in images:
-            img.close()
-            
         return True
         
     except Exception as e:
@@ -124,10 +124,24 @@ class ModularAppGUI(tk.Tk):
             messagebox.showerror("File Not Found", f"Input file does not exist: {input_path}")
             return
             
-        # Create a temporary file for the compressed image
-        base_name = os.path.basename(input_path)
-        name, ext = os.path.splitext(base_name)
-        temp_output_path = os.path.join(os.path.dirname(input_path), f"temp_{name}_compressed{ext}")
+        # Let the user choose where to save the compressed file up front
+        filetypes = (
+            ("Image files", "*.jpg *.jpeg *.png *.gif *.bmp"),
+            ("All files", "*.*")
+        )
+        name, ext = os.path.splitext(os.path.basename(input_path))
+        output_path = filedialog.asksaveasfilename(
+            title="Save Compressed Image As",
+            filetypes=filetypes,
+            initialfile=f"{name}_compressed{ext}"
+        )
+        
+        if not output_path:
+            self.status_var.set("Save cancelled")
+            return
+        
+        # Compress next to the destination so the final step is a same-filesystem rename
+        partial_path = output_path + ".partial"
         
         # Start compression in a separate thread to keep the UI responsive
         self.status_var.set("Compressing image...")
@@ -136,82 +150,51 @@ class ModularAppGUI(tk.Tk):
         # Create and start the thread
         thread = threading.Thread(
             target=self._run_compression,
-            args=(input_path, temp_output_path, target_size)
+            args=(input_path, partial_path, output_path, target_size)
         )
         thread.daemon = True
         thread.start()
     
-    def _run_compression(self, input_path, temp_output_path, target_size):
+    def _run_compression(self, input_path, partial_path, output_path, target_size):
         """Run the compression task and update the UI when done."""
         try:
             self.progress_var.set(40)
-            result = compress_image(input_path, temp_output_path, target_size * 1024)  # Convert KB to bytes
+            result = compress_image(input_path, partial_path, target_size * 1024)  # Convert KB to bytes
+            if result:
+                os.replace(partial_path, output_path)
             self.progress_var.set(100)
             
             # Schedule UI updates to run on the main thread
-            self.after(0, self._compression_done, result, temp_output_path)
+            self.after(0, self._compression_done, result, output_path)
         except Exception as e:
             # Schedule error handling to run on the main thread
             self.after(0, self._compression_error, str(e))
-            # Try to clean up temp file if it exists
-            try:
-                if os.path.exists(temp_output_path):
-                    os.remove(temp_output_path)
-            except:
-                pass
-    
-    def _compression_done(self, success, temp_output_path):
-        """Handle completion of the compression task."""
-        try:
-            if success:
-                final_size_kb = os.path.getsize(temp_output_path) // 1024
-                self.status_var.set("Compression complete. Select where to save.")
-                
-                # Let the user choose where to save the compressed file
-                filetypes = (
-                    ("Image files", "*.jpg *.jpeg *.png *.gif *.bmp"),
-                    ("All files", "*.*")
-                )
-                
-                # Get initial filename suggestion
-                base_name = os.path.basename(temp_output_path)
-                name = os.path.splitext(base_name)[0].replace("temp_", "")
-                ext = os.path.splitext(self.input_path_var.get())[1]
-                initial_filename = f"{name}{ext}"
-                
-                output_path = filedialog.asksaveasfilename(
-                    title="Save Compressed Image As",
-                    filetypes=filetypes,
-                    initialfile=initial_filename
-                )
-                
-                if output_path:
-                    # Copy the temp file to the chosen location
-                    import shutil
-                    shutil.copy2(temp_output_path, output_path)
-                    
-                    # Show success message
-                    self.status_var.set(f"Saved. Final size: {final_size_kb} KB")
-                    messagebox.showinfo(
-                        "Success", 
-                        f"Image compressed successfully.\nFinal size: {final_size_kb} KB\nSaved to: {output_path}"
-                    )
-                else:
-                    self.status_var.set("Save cancelled")
-            else:
-                self.status_var.set("Compression completed but target size not reached")
-                messagebox.showwarning(
-                    "Warning", 
-                    "Compression completed but could not reach the target size while maintaining acceptable quality."
-                )
         finally:
-            # Clean up the temp file
+            # Clean up the partial file if it was not moved into place
             try:
-                if os.path.exists(temp_output_path):
-                    os.remove(temp_output_path)
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
             except Exception as e:
                 print(f"Failed to remove temporary file: {e}")
     
+    def _compression_done(self, success, output_path):
+        """Handle completion of the compression task."""
+        if success:
+            final_size_kb = os.path.getsize(output_path) // 1024
+            
+            # Show success message
+            self.status_var.set(f"Saved. Final size: {final_size_kb} KB")
+            messagebox.showinfo(
+                "Success", 
+                f"Image compressed successfully.\nFinal size: {final_size_kb} KB\nSaved to: {output_path}"
+            )
+        else:
+            self.status_var.set("Compression completed but target size not reached")
+            messagebox.showwarning(
+                "Warning", 
+                "Compression completed but could not reach the target size while maintaining acceptable quality."
+            )
+    
     def _compression_error(self, error_message):
         """Handle errors during compression."""
         self.status_var.set("Error during compression")